@@ -179,15 +179,19 @@ def append_vote(voter_name: str, employee_id: str, first_id: str, second_id: str
 # ============================
 def aggregate(cands: pd.DataFrame, votes: pd.DataFrame, include_inactive: bool = True) -> pd.DataFrame:
     id_to_label = {r.id: r.label for r in cands.itertuples()}
-    active_ids = set(cands[cands["active"]]["id"]) if not include_inactive else set(cands["id"])
-    stats: Dict[str, Dict[str, int]] = {cid: {"points": 0, "first": 0, "second": 0, "third": 0} for cid in active_ids}
-    for _, row in votes.iterrows():
-        f, s, t = row.get("first_id"), row.get("second_id"), row.get("third_id")
-        if f in stats: stats[f]["points"] += 3; stats[f]["first"] += 1
-        if s in stats: stats[s]["points"] += 2; stats[s]["second"] += 1
-        if t in stats: stats[t]["points"] += 1; stats[t]["third"] += 1
-    rows = [{"候補": id_to_label.get(cid, f"[{cid}]"), **v} for cid, v in stats.items()]
-    df = pd.DataFrame(rows)
+    active_ids = cands[cands["active"]]["id"] if not include_inactive else cands["id"]
+    ids = pd.Index(active_ids.drop_duplicates())
+    # 1/2/3位の回数を列ごとに一括カウント（行ループなし）
+    first = votes["first_id"].value_counts().reindex(ids, fill_value=0)
+    second = votes["second_id"].value_counts().reindex(ids, fill_value=0)
+    third = votes["third_id"].value_counts().reindex(ids, fill_value=0)
+    df = pd.DataFrame({
+        "候補": ids.map(lambda cid: id_to_label.get(cid, f"[{cid}]")),
+        "points": 3 * first.values + 2 * second.values + 1 * third.values,
+        "first": first.values,
+        "second": second.values,
+        "third": third.values,
+    })
     if df.empty:
         return pd.DataFrame(columns=["候補", "points", "first", "second", "third"])
     df = df.sort_values(["points", "first", "second", "third", "候補"],
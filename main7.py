@@ -10,11 +10,16 @@ Streamlit版 3-2-1投票アプリ（ID方式・翻訳抑止・候補編集/同
 - 投票一覧：氏名・社員番号つきの生票一覧表示とCSVダウンロード
 - 管理：候補の追加／名称変更／有効/無効切替、同義統合、候補の完全削除
 - 翻訳抑止：Google翻訳の自動提案を軽減
-- 時刻：JST（pytz使用、既定 Asia/Tokyo）
+- 時刻：JST（zoneinfo使用、既定 Asia/Tokyo）
 - 重複投票防止：社員番号で1人1回（完全禁止）
 
+■ データファイル
+  candidates.feather : 候補（id,label,active,key）。Arrow 形式で型を保持。旧 candidates.csv は初回のみ移行元
+  votes.csv          : 投票（1票1行の追記専用ログ。Parquet/Feather は行追記できないため CSV のまま）
+  voted.txt          : 投票済みの社員番号（正規化済み・1行1件）
+
 ■ 起動
-  pip install streamlit pandas altair pytz
+  pip install streamlit pandas altair
   # ポート変更（例）:
   streamlit run app.py --server.port 8502
   → 投票:   http://localhost:8502/?page=vote
@@ -23,9 +28,11 @@ Streamlit版 3-2-1投票アプリ（ID方式・翻訳抑止・候補編集/同
 """
 
 from __future__ import annotations
-import os, re, unicodedata, uuid
+import csv, io, os, re, shutil, unicodedata, uuid
 from datetime import datetime
-from typing import Dict
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+from zoneinfo import ZoneInfo
 
 # ====== bの安定化設定（環境変数で反映）======
 # ※ streamlit import より前に設定すること！
@@ -34,13 +41,13 @@ os.environ.setdefault("STREAMLIT_SERVER_FILE_WATCHER_TYPE", "poll")       # 同
 os.environ.setdefault("STREAMLIT_SERVER_MAX_MESSAGE_SIZE", "200")         # 余裕を持たせる
 os.environ.setdefault("STREAMLIT_SERVER_ENABLE_CORS", "false")            # ローカル用途のみ推奨
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 import altair as alt
-import pytz
 
 # ===== タイムゾーン（既定: Asia/Tokyo） =====
-TZ = pytz.timezone(os.getenv("APP_TIMEZONE", "Asia/Tokyo"))
+TZ = ZoneInfo(os.getenv("APP_TIMEZONE", "Asia/Tokyo"))
 
 st.set_page_config(page_title="3-2-1 投票アプリ", layout="centered")
 
@@ -73,6 +80,7 @@ disable_auto_translate()
 # -----------------------------
 # 正規化ヘルパ
 # -----------------------------
+@lru_cache(maxsize=4096)
 def norm_emp_id(s: str) -> str:
     """社員番号の正規化：全角→半角、前後空白除去、英字は大文字へ"""
     if not isinstance(s, str):
@@ -90,6 +98,12 @@ ALIAS_MAP = {
     "包装": "パッケージ",
 }
 
+# 記号・空白系（normalize_for_merge で除去）
+_STRIP_RE = re.compile(r"[\s,、。・~〜\-_\/]+")
+# ひらがな→カタカナ（str.translate 用の変換表）
+_HIRA2KATA = {c: c + 0x60 for c in range(0x3041, 0x3097)}
+
+@lru_cache(maxsize=4096)
 def normalize_for_merge(name: str) -> str:
     """同一視キー（NFKC、ひら→カナ、記号・空白除去、別名吸収）"""
     if not isinstance(name, str):
@@ -97,13 +111,10 @@ def normalize_for_merge(name: str) -> str:
     s = unicodedata.normalize("NFKC", name.strip())
 
     # ひらがな→カタカナ
-    def hira_to_kata(ch: str) -> str:
-        o = ord(ch)
-        return chr(o + 0x60) if 0x3041 <= o <= 0x3096 else ch
-    s = "".join(hira_to_kata(c) for c in s)
+    s = s.translate(_HIRA2KATA)
 
     # 記号・空白系を除去
-    s = re.sub(r"[\s,、。・~〜\-_\/]+", "", s)
+    s = _STRIP_RE.sub("", s)
 
     # 別名テーブル適用（全文一致）
     s = ALIAS_MAP.get(s, s)
@@ -112,8 +123,10 @@ def normalize_for_merge(name: str) -> str:
 # -----------------------------
 # ファイルパス
 # -----------------------------
-CANDS_FILE = "candidates.csv"   # id,label,active
+CANDS_FILE = "candidates.feather"  # id,label,active,key（Arrow/Feather 形式）
+CANDS_CSV = "candidates.csv"       # 旧形式（初回の移行元としてのみ読み込み）
 VOTES_FILE = "votes.csv"        # voter_name,employee_id,first_id,second_id,third_id,time
+VOTED_FILE = "voted.txt"        # 投票済み社員番号（正規化済み・1行1件）
 
 # 初期候補（初回生成用）
 DEFAULT_CANDIDATES = ["候補A", "候補B", "候補C", "候補D"]
@@ -121,27 +134,69 @@ DEFAULT_CANDIDATES = ["候補A", "候補B", "候補C", "候補D"]
 # ============================
 # データI/O & マイグレーション
 # ============================
+def _mtime(path: str) -> float:
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+def _replace_atomically(path: str, write: Callable[[str], None]):
+    """同じディレクトリの一意な一時ファイルに write(tmp) で書き、os.replace で path と置換
+    （セッションごとに別の一時ファイルになるので、同時保存でも書きかけのファイルは公開されない）"""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    # 0o666 で作成して新規ファイルは umask どおりの権限に（os.umask の読み書きはスレッド間で競合するため使わない）
+    os.close(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+    try:
+        write(tmp)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)  # 既存ファイルの権限（共有フォルダのグループ書き込み等）を引き継ぐ
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _read_candidates(path: str, mtime: float) -> pd.DataFrame:
+    """候補ファイルの生読み込み（mtime が変わるまでキャッシュ）"""
+    if path.endswith(".feather"):
+        return pd.read_feather(path)
+    # 旧 CSV: id・名称は文字列のまま読む（数字だけの ID の先頭ゼロを落とさない）。active は bool 推論に任せる
+    return pd.read_csv(path, dtype={"id": str, "label": str, "name": str})
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _read_votes(path: str, mtime: float) -> pd.DataFrame:
+    """votes.csv の生読み込み（mtime が変わるまでキャッシュ、dtype=str）"""
+    return pd.read_csv(path, dtype=str)
+
 def ensure_candidates_schema() -> pd.DataFrame:
-    """candidates.csv を id,label,active に正規化。旧 name にも対応。"""
+    """
+    candidates.feather（id,label,active,key）を読み込む。
+    無ければ candidates.csv（id,label,active / 旧 name）から移行し、それも無ければ初期候補で生成。
+    """
     if os.path.exists(CANDS_FILE):
-        df = pd.read_csv(CANDS_FILE)
+        # Feather は型を保持するので active は bool のまま読める
+        df = _read_candidates(CANDS_FILE, _mtime(CANDS_FILE))
+        if "key" not in df.columns:
+            df["key"] = df["label"].map(normalize_for_merge)
+        return df[["id", "label", "active", "key"]]
+    df = None
+    if os.path.exists(CANDS_CSV):
+        df = _read_candidates(CANDS_CSV, _mtime(CANDS_CSV))
         if set(df.columns) >= {"id", "label", "active"}:
-            df["active"] = df["active"].astype(bool)
-            return df[["id", "label", "active"]]
-        if set(df.columns) >= {"name"}:
+            df = df[["id", "label", "active"]]
+        elif set(df.columns) >= {"name"}:
             df = df.rename(columns={"name": "label"})
             df["active"] = df.get("active", True)
             df["id"] = [uuid.uuid4().hex[:8] for _ in range(len(df))]
             df = df[["id", "label", "active"]]
-            df.to_csv(CANDS_FILE, index=False)
-            return df
-    df = pd.DataFrame({
-        "id": [uuid.uuid4().hex[:8] for _ in DEFAULT_CANDIDATES],
-        "label": DEFAULT_CANDIDATES,
-        "active": [True] * len(DEFAULT_CANDIDATES),
-    })
-    df.to_csv(CANDS_FILE, index=False)
-    return df
+        else:
+            df = None
+    if df is None:
+        df = pd.DataFrame({
+            "id": [uuid.uuid4().hex[:8] for _ in DEFAULT_CANDIDATES],
+            "label": DEFAULT_CANDIDATES,
+            "active": [True] * len(DEFAULT_CANDIDATES),
+        })
+    save_candidates(df)
+    return ensure_candidates_schema()
 
 def ensure_votes_schema(cands: pd.DataFrame) -> pd.DataFrame:
     """
@@ -149,26 +204,29 @@ def ensure_votes_schema(cands: pd.DataFrame) -> pd.DataFrame:
     旧 first/second/third（ラベル）にも対応。読み込みは dtype=str で先頭ゼロを保持。
     """
     if os.path.exists(VOTES_FILE):
-        df = pd.read_csv(VOTES_FILE, dtype=str)
+        df = _read_votes(VOTES_FILE, _mtime(VOTES_FILE))
         if set(df.columns) >= {"first_id", "second_id", "third_id"}:
-            if "voter_name" not in df.columns: df["voter_name"] = ""
-            if "employee_id" not in df.columns: df["employee_id"] = ""
-            if "time" not in df.columns: df["time"] = ""
-            df = df[["voter_name", "employee_id", "first_id", "second_id", "third_id", "time"]]
-            df.to_csv(VOTES_FILE, index=False)
+            cols = ["voter_name", "employee_id", "first_id", "second_id", "third_id", "time"]
+            # 列の不足・余分・並び順のどれかが違えば書き戻す（追記は正規の列順で行うため）
+            migrated = list(df.columns) != cols
+            for col in ("voter_name", "employee_id", "time"):
+                if col not in df.columns:
+                    df[col] = ""
+            df = df[cols]
+            if migrated:
+                save_votes(df)
             return df
         if set(df.columns) >= {"first", "second", "third"}:
-            label_to_id: Dict[str, str] = {r.label: r.id for r in cands.itertuples()}
-            def map_label(s): return label_to_id.get(s, None)
+            label_to_id: Dict[str, str] = dict(zip(cands["label"], cands["id"]))
             conv = pd.DataFrame({
                 "voter_name": df.get("voter_name", ""),
                 "employee_id": df.get("employee_id", ""),
-                "first_id": df["first"].map(map_label),
-                "second_id": df["second"].map(map_label),
-                "third_id": df["third"].map(map_label),
+                "first_id": df["first"].map(label_to_id),
+                "second_id": df["second"].map(label_to_id),
+                "third_id": df["third"].map(label_to_id),
                 "time": df.get("time", ""),
             })
-            conv.to_csv(VOTES_FILE, index=False)
+            save_votes(conv)
             return conv
     return pd.DataFrame(columns=["voter_name", "employee_id", "first_id", "second_id", "third_id", "time"])
 
@@ -178,40 +236,123 @@ def load_candidates() -> pd.DataFrame:
 def save_candidates(df: pd.DataFrame):
     df = df.copy()
     df["active"] = df["active"].astype(bool)
-    df = df.drop_duplicates(subset=["id"]).reset_index(drop=True)
-    df.to_csv(CANDS_FILE, index=False)
-
-def load_votes() -> pd.DataFrame:
+    df["key"] = df["label"].map(normalize_for_merge)  # 同一視キーは保存時に確定
+    df = df.drop_duplicates(subset=["id"]).reset_index(drop=True)[["id", "label", "active", "key"]]
+    # ディスク上（キャッシュ済み）の内容と同じなら書き込まない
+    if os.path.exists(CANDS_FILE) and df.equals(_read_candidates(CANDS_FILE, _mtime(CANDS_FILE))):
+        return
+    # votes.csv と同じく一時ファイルに書いてから os.replace で置換（書き込み途中のファイルを読ませない）
+    # ※ ロックはしていないため、同時に保存すると後から置換した側の内容だけが残る
+    _replace_atomically(CANDS_FILE, df.to_feather)
+    _read_candidates.clear()
+    _id_label_map.clear()
+    _key_index.clear()
+    cached_aggregate.clear()
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _id_label_map(path: str, mtime: float) -> Dict[str, str]:
+    """候補ID → 表示名（投票・集計ページ共通）"""
     cands = ensure_candidates_schema()
-    return ensure_votes_schema(cands)
+    return dict(zip(cands["id"], cands["label"]))
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _key_index(path: str, mtime: float) -> Dict[str, str]:
+    """同一視キー → 候補ID（同じキーが複数あれば先頭の候補）"""
+    cands = ensure_candidates_schema().drop_duplicates(subset=["key"])
+    return dict(zip(cands["key"], cands["id"]))
+
+def load_votes(cands: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """cands を渡せば候補の読み込みを省略（同じ実行内で読み込み済みのものを使う）"""
+    if cands is None:
+        cands = ensure_candidates_schema()
+    votes = ensure_votes_schema(cands)
+    # *_id は候補IDを共通カテゴリとする category 型へ（候補に無いIDもカテゴリに残す）
+    id_cols = ["first_id", "second_id", "third_id"]
+    seen = pd.Index(pd.unique(votes[id_cols].to_numpy().ravel())).dropna()
+    id_dtype = pd.CategoricalDtype(categories=pd.Index(cands["id"]).append(seen).unique())
+    return votes.astype({col: id_dtype for col in id_cols})
+
+def save_votes(df: pd.DataFrame):
+    """votes.csv を丸ごと書き直す（一時ファイルに書いてから os.replace で置換）
+    ※ ロックはしていない。df を読み込んでから保存するまでの間に他のセッションが
+      append_vote した票は上書きで失われる（voted.txt 側には残るため再投票もできない）。
+      候補の統合・削除や票の付替えは投票受付中を避けて行うこと。"""
+    def write(tmp: str):
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, index=False)
+    _replace_atomically(VOTES_FILE, write)
+    _read_votes.clear()
+    cached_aggregate.clear()
+
+def remap_vote_ids(votes: pd.DataFrame, mapping: Dict[str, Optional[str]]) -> pd.DataFrame:
+    """1〜3位の *_id を3列まとめて1回で付替え（mapping: 旧ID → 新ID、None は空欄）"""
+    id_cols = ["first_id", "second_id", "third_id"]
+    flat = pd.Series(votes[id_cols].to_numpy(dtype=object).ravel())
+    remapped = flat.replace(mapping).to_numpy().reshape(-1, len(id_cols))
+    return votes.assign(**{col: remapped[:, j] for j, col in enumerate(id_cols)})
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _read_voted(path: str, mtime: float) -> frozenset:
+    """voted.txt の生読み込み（mtime が変わるまでキャッシュ）"""
+    with open(path, encoding="utf-8") as f:
+        return frozenset(line.rstrip("\n") for line in f if line.strip())
+
+def _load_voted_set() -> frozenset:
+    """投票済み社員番号（正規化済み）の集合。voted.txt が無ければ votes.csv から作る。"""
+    if not os.path.exists(VOTED_FILE):
+        votes = load_votes()
+        # 生の値で先に重複を落としてから正規化（判定自体は frozenset で O(1)）
+        emp_ids = {norm_emp_id(str(e)) for e in pd.unique(votes["employee_id"].dropna())}
+        with open(VOTED_FILE, "w", encoding="utf-8") as f:
+            f.writelines(e + "\n" for e in sorted(emp_ids) if e)
+    return _read_voted(VOTED_FILE, _mtime(VOTED_FILE))
+
+def _mark_voted(emp_norm: str):
+    if not os.path.exists(VOTED_FILE):
+        _load_voted_set()  # 先に votes.csv から既存分を作っておく
+    with open(VOTED_FILE, "a", encoding="utf-8") as f:
+        f.write(emp_norm + "\n")
+    _read_voted.clear()
 
 def append_vote(voter_name: str, employee_id: str, first_id: str, second_id: str, third_id: str):
-    votes = load_votes()
-    new_row = {
-        "voter_name": voter_name,
-        "employee_id": employee_id,
-        "first_id": first_id,
-        "second_id": second_id,
-        "third_id": third_id,
-        "time": datetime.now(TZ).isoformat(timespec="seconds"),
-    }
-    votes = pd.concat([votes, pd.DataFrame([new_row])], ignore_index=True)
-    votes.to_csv(VOTES_FILE, index=False)
+    """1票を votes.csv の末尾に1行追記（全体の読み直し・書き直しはしない）"""
+    columns = ["voter_name", "employee_id", "first_id", "second_id", "third_id", "time"]
+    need_header = not os.path.exists(VOTES_FILE) or os.path.getsize(VOTES_FILE) == 0
+    if not need_header:
+        # ヘッダ行だけ見て、旧形式のときだけ DataFrame 経由で移行する
+        with open(VOTES_FILE, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+        if header != columns:
+            load_votes()
+    with open(VOTES_FILE, "a", newline="", encoding="utf-8", buffering=1 << 18) as f:
+        w = csv.writer(f, lineterminator="\n")
+        if need_header:
+            w.writerow(columns)
+        w.writerow([voter_name, employee_id, first_id, second_id, third_id,
+                    datetime.now(TZ).isoformat(timespec="seconds")])
+    _read_votes.clear()
+    cached_aggregate.clear()
+    _mark_voted(norm_emp_id(employee_id))
 
 # ============================
 # 集計
 # ============================
-def aggregate(cands: pd.DataFrame, votes: pd.DataFrame, include_inactive: bool = True) -> pd.DataFrame:
-    id_to_label = {r.id: r.label for r in cands.itertuples()}
-    active_ids = set(cands[cands["active"]]["id"]) if not include_inactive else set(cands["id"])
-    stats: Dict[str, Dict[str, int]] = {cid: {"points": 0, "first": 0, "second": 0, "third": 0} for cid in active_ids}
-    for _, row in votes.iterrows():
-        f, s, t = row.get("first_id"), row.get("second_id"), row.get("third_id")
-        if f in stats: stats[f]["points"] += 3; stats[f]["first"] += 1
-        if s in stats: stats[s]["points"] += 2; stats[s]["second"] += 1
-        if t in stats: stats[t]["points"] += 1; stats[t]["third"] += 1
-    rows = [{"候補": id_to_label.get(cid, f"[{cid}]"), **v} for cid, v in stats.items()]
-    df = pd.DataFrame(rows)
+def aggregate(cands: pd.DataFrame, votes: pd.DataFrame, id_to_label: Dict[str, str],
+              include_inactive: bool = True) -> pd.DataFrame:
+    active_ids = cands[cands["active"]]["id"] if not include_inactive else cands["id"]
+    ids = pd.Index(active_ids.drop_duplicates())
+    # 集計対象IDをカテゴリとしたコードで 1/2/3位の回数を一括カウント（対象外は -1）
+    counts = np.zeros((len(ids), 3), dtype=np.int64)
+    for j, col in enumerate(["first_id", "second_id", "third_id"]):
+        codes = pd.Categorical(votes[col], categories=ids).codes
+        counts[:, j] = np.bincount(codes[codes >= 0], minlength=len(ids))
+    df = pd.DataFrame({
+        "候補": ids.map(lambda cid: id_to_label.get(cid, f"[{cid}]")),
+        "points": counts @ np.array([3, 2, 1]),
+        "first": counts[:, 0],
+        "second": counts[:, 1],
+        "third": counts[:, 2],
+    })
     if df.empty:
         return pd.DataFrame(columns=["候補", "points", "first", "second", "third"])
     df = df.sort_values(["points", "first", "second", "third", "候補"],
@@ -219,24 +360,82 @@ def aggregate(cands: pd.DataFrame, votes: pd.DataFrame, include_inactive: bool =
     df.index = range(1, len(df) + 1)
     return df
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_aggregate(cands_mtime: float, votes_mtime: float, include_inactive: bool) -> pd.DataFrame:
+    """集計結果を候補・投票ファイルの更新時刻と include_inactive ごとにキャッシュ
+    （mtime の粒度が粗い環境もあるため、書き込み側でも clear する）"""
+    cands = load_candidates()
+    return aggregate(cands, load_votes(cands), _id_label_map(CANDS_FILE, cands_mtime),
+                     include_inactive=include_inactive)
+
 # ============================
 # JST表示ヘルパ
 # ============================
-def to_jst_str(s: str) -> str:
-    try:
-        if not isinstance(s, str):
-            s = str(s)
-        if not s:
-            return s
-        dt_utc = pd.to_datetime(s, utc=True, errors="coerce")
-        if pd.isna(dt_utc):
-            dt_naive = pd.to_datetime(s, errors="coerce")
-            if pd.isna(dt_naive):
-                return s
-            return dt_naive.tz_localize(TZ).strftime("%Y-%m-%d %H:%M:%S")
-        return dt_utc.tz_convert("Asia/Tokyo").strftime("%Y-%m-%d %H:%M:%S")
-    except Exception:
-        return s
+def to_jst_series(s: pd.Series) -> pd.Series:
+    """time 列をまとめて JST 表示へ（タイムゾーン無しは UTC とみなす。解釈できない値はそのまま）"""
+    dt_utc = pd.to_datetime(s, utc=True, errors="coerce", format="mixed")
+    formatted = dt_utc.dt.tz_convert("Asia/Tokyo").dt.strftime("%Y-%m-%d %H:%M:%S")
+    return formatted.where(dt_utc.notna(), s)
+
+# ============================
+# グラフ（集計結果が同じ間はキャッシュ）
+# ============================
+@st.cache_data(show_spinner=False, max_entries=4)
+def build_points_chart(res_df: pd.DataFrame) -> alt.Chart:
+    """合計ポイントの棒グラフ"""
+    chart_df = (
+        res_df.reset_index()
+              .rename(columns={"index": "順位", "points": "合計ポイント"})
+    )
+    return (
+        alt.Chart(chart_df)
+           .mark_bar()
+           .encode(
+               x=alt.X("候補:N", sort='-y', title="候補"),
+               y=alt.Y("合計ポイント:Q", title="合計ポイント"),
+               tooltip=["順位","候補","合計ポイント","first","second","third"]
+           )
+           .properties(height=320)
+    )
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def build_counts_chart(res_df: pd.DataFrame) -> alt.Chart:
+    """1位・2位・3位 回数の積み上げ棒グラフ"""
+    counts_df = (
+        res_df.reset_index()
+              .rename(columns={
+                  "index": "順位",
+                  "first": "1位回数",
+                  "second": "2位回数",
+                  "third": "3位回数",
+              })
+    )
+    counts_melt = counts_df.melt(
+        id_vars=["順位","候補"],
+        value_vars=["1位回数","2位回数","3位回数"],
+        var_name="区分", value_name="回数"
+    )
+    return (
+        alt.Chart(counts_melt)
+           .mark_bar()
+           .encode(
+               x=alt.X("候補:N", sort='-y', title="候補"),
+               y=alt.Y("回数:Q", title="回数"),
+               color=alt.Color("区分:N", title="順位区分"),
+               tooltip=["順位","候補","区分","回数"]
+           )
+           .properties(height=320)
+    )
+
+# ============================
+# CSVダウンロード用ヘルパ
+# ============================
+def to_csv_buffer(df: pd.DataFrame) -> io.BytesIO:
+    """DataFrame を行チャンクごとにバイトバッファへ書き出す（巨大な str を一度に作らない）"""
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, chunksize=10_000, encoding="utf-8")
+    buf.seek(0)
+    return buf
 
 # ============================
 # ページ切替
@@ -248,29 +447,29 @@ page = params.get("page", "vote")
 if page == "vote":
     st.header("投票フォーム (1位=3点, 2位=2点, 3位=1点)")
     cands = load_candidates()
-    votes = load_votes()
 
-    voter_name = st.text_input("お名前（氏名）", placeholder="例：山田 太郎")
-    employee_id = st.text_input("社員番号", placeholder="例：A12345")
-
-    active = cands[cands["active"]].reset_index(drop=True)
-    if active.empty:
+    id_list = cands["id"].to_numpy()[cands["active"].to_numpy(dtype=bool)].tolist()
+    if not id_list:
         st.info("現在、投票可能な候補がありません。管理ページで候補を有効化してください。")
-    id_list = active["id"].tolist()
-    id_to_label = {r.id: r.label for r in active.itertuples()}
+    id_to_label = _id_label_map(CANDS_FILE, _mtime(CANDS_FILE))
 
-    sig = "|".join(id_list)
+    sig = tuple(id_list)
     if st.session_state.get("_id_sig") != sig:
         for key in ("first_sel", "second_sel", "third_sel"):
             st.session_state.pop(key, None)
         st.session_state["_id_sig"] = sig
 
+    # 入力・選択はフォームにまとめ、送信時だけ再実行させる
     def fmt(cid: str) -> str: return id_to_label.get(cid, "")
-    first_id = st.selectbox("1位 (3点)", [None] + id_list, format_func=lambda x: "(未選択)" if x is None else fmt(x), key="first_sel")
-    second_id = st.selectbox("2位 (2点)", [None] + id_list, format_func=lambda x: "(未選択)" if x is None else fmt(x), key="second_sel")
-    third_id  = st.selectbox("3位 (1点)", [None] + id_list, format_func=lambda x: "(未選択)" if x is None else fmt(x), key="third_sel")
-
-    if st.button("投票を送信", type="primary"):
+    with st.form("vote_form"):
+        voter_name = st.text_input("お名前（氏名）", placeholder="例：山田 太郎")
+        employee_id = st.text_input("社員番号", placeholder="例：A12345")
+        first_id = st.selectbox("1位 (3点)", [None] + id_list, format_func=lambda x: "(未選択)" if x is None else fmt(x), key="first_sel")
+        second_id = st.selectbox("2位 (2点)", [None] + id_list, format_func=lambda x: "(未選択)" if x is None else fmt(x), key="second_sel")
+        third_id  = st.selectbox("3位 (1点)", [None] + id_list, format_func=lambda x: "(未選択)" if x is None else fmt(x), key="third_sel")
+        submitted = st.form_submit_button("投票を送信", type="primary")
+
+    if submitted:
         if not voter_name or not employee_id:
             st.error("お名前と社員番号を入力してください")
         elif None in (first_id, second_id, third_id):
@@ -279,13 +478,9 @@ if page == "vote":
             st.error("同じ候補は重複して選べません")
         else:
             emp_norm = norm_emp_id(employee_id)
-            v = load_votes()
-            if not v.empty:
-                v = v.copy()
-                v["employee_id_norm"] = v["employee_id"].astype(str).map(norm_emp_id)
-                if emp_norm in set(v["employee_id_norm"]):
-                    st.error("この社員番号では既に投票済みです（1人1回まで）。")
-                    st.stop()
+            if emp_norm in _load_voted_set():
+                st.error("この社員番号では既に投票済みです（1人1回まで）。")
+                st.stop()
 
             append_vote(voter_name, employee_id, first_id, second_id, third_id)
             st.query_params.update(page="thanks")
@@ -299,10 +494,11 @@ elif page == "admin":
         st.rerun()
 
     cands = load_candidates()
-    votes = load_votes()
+    votes = load_votes(cands)
+    id_to_label = _id_label_map(CANDS_FILE, _mtime(CANDS_FILE))
 
     include_inactive = st.checkbox("非表示候補も集計表に含める", value=True)
-    res_df = aggregate(cands, votes, include_inactive=include_inactive)
+    res_df = cached_aggregate(_mtime(CANDS_FILE), _mtime(VOTES_FILE), include_inactive)
 
     st.subheader("順位表")
     if votes.empty or res_df.empty:
@@ -320,57 +516,18 @@ elif page == "admin":
                   })
         )
         st.dataframe(res_df_disp, use_container_width=True)
-    csv = res_df_disp.to_csv(index=False)
-    st.download_button("順位表CSVダウンロード", data=csv, file_name="result.csv", mime="text/csv")
+    st.download_button("順位表CSVダウンロード", data=to_csv_buffer(res_df_disp),
+                       file_name="result.csv", mime="text/csv")
 
     st.subheader("合計ポイント（棒グラフ）")
     if not res_df.empty:
-        chart_df = (
-            res_df.reset_index()
-                  .rename(columns={"index": "順位", "points": "合計ポイント"})
-        )
-        chart = (
-            alt.Chart(chart_df)
-               .mark_bar()
-               .encode(
-                   x=alt.X("候補:N", sort='-y', title="候補"),
-                   y=alt.Y("合計ポイント:Q", title="合計ポイント"),
-                   tooltip=["順位","候補","合計ポイント","first","second","third"]
-               )
-               .properties(height=320)
-        )
-        st.altair_chart(chart, use_container_width=True)
+        st.altair_chart(build_points_chart(res_df), use_container_width=True)
     else:
         st.caption("投票が入るとここに合計ポイントのグラフが表示されます。")
 
     st.subheader("1位・2位・3位 回数（積み上げ棒グラフ）")
     if not res_df.empty:
-        counts_df = (
-            res_df.reset_index()
-                  .rename(columns={
-                      "index": "順位",
-                      "first": "1位回数",
-                      "second": "2位回数",
-                      "third": "3位回数",
-                  })
-        )
-        counts_melt = counts_df.melt(
-            id_vars=["順位","候補"],
-            value_vars=["1位回数","2位回数","3位回数"],
-            var_name="区分", value_name="回数"
-        )
-        chart2 = (
-            alt.Chart(counts_melt)
-               .mark_bar()
-               .encode(
-                   x=alt.X("候補:N", sort='-y', title="候補"),
-                   y=alt.Y("回数:Q", title="回数"),
-                   color=alt.Color("区分:N", title="順位区分"),
-                   tooltip=["順位","候補","区分","回数"]
-               )
-               .properties(height=320)
-        )
-        st.altair_chart(chart2, use_container_width=True)
+        st.altair_chart(build_counts_chart(res_df), use_container_width=True)
 
     st.divider()
 
@@ -378,23 +535,24 @@ elif page == "admin":
     if votes.empty:
         st.info("まだ投票はありません")
     else:
-        id_to_label = {r.id: r.label for r in cands.itertuples()}
         detail_df = votes.copy()
-        detail_df["1位"] = detail_df["first_id"].map(id_to_label)
-        detail_df["2位"] = detail_df["second_id"].map(id_to_label)
-        detail_df["3位"] = detail_df["third_id"].map(id_to_label)
+        # 1〜3位は共通カテゴリなので、カテゴリ→ラベル表をコードで引く（末尾の NaN は欠損 -1 用）
+        id_cols = ["first_id", "second_id", "third_id"]
+        cat_labels = np.append(detail_df["first_id"].cat.categories.map(id_to_label).to_numpy(dtype=object), np.nan)
+        codes = np.column_stack([detail_df[col].cat.codes.to_numpy() for col in id_cols])
+        detail_df[["1位", "2位", "3位"]] = cat_labels[codes]
         if "time" in detail_df.columns:
-            detail_df["time"] = detail_df["time"].astype(str).map(to_jst_str)
+            detail_df["time"] = to_jst_series(detail_df["time"])
         show_cols = ["voter_name", "employee_id", "1位", "2位", "3位", "time"]
         show_cols = [c for c in show_cols if c in detail_df.columns]
         st.dataframe(detail_df[show_cols], use_container_width=True)
-        csv_detail = detail_df[show_cols].to_csv(index=False)
         st.download_button("投票一覧CSVをダウンロード（氏名・社員番号付き）",
-                           data=csv_detail, file_name="votes_detail.csv", mime="text/csv")
+                           data=to_csv_buffer(detail_df[show_cols]), file_name="votes_detail.csv", mime="text/csv")
 
     st.divider()
 
     st.subheader("候補の編集")
+    key_index = _key_index(CANDS_FILE, _mtime(CANDS_FILE))
 
     col_add1, col_add2 = st.columns([3, 1])
     with col_add1:
@@ -406,91 +564,85 @@ elif page == "admin":
                 st.warning("候補名を入力してください")
             else:
                 key_new = normalize_for_merge(label_s)
-                tmp = cands.copy(); tmp["_key"] = tmp["label"].apply(normalize_for_merge)
-                conflict = tmp[tmp["_key"] == key_new]
+                base_id = key_index.get(key_new)
 
-                if conflict.empty:
-                    row = pd.DataFrame([[uuid.uuid4().hex[:8], label_s, True]],
-                                       columns=["id", "label", "active"])
-                    cands = pd.concat([cands, row], ignore_index=True)
+                if base_id is None:
+                    # 読み込み直後の cands は 0..N-1 の連番インデックスなので末尾に1行追加
+                    cands.loc[len(cands)] = [uuid.uuid4().hex[:8], label_s, True, key_new]
                     save_candidates(cands)
                     st.success(f"候補『{label_s}』を追加しました")
                 else:
-                    base = conflict.iloc[0]
-                    base_id = base["id"]
                     cands.loc[cands["id"] == base_id, ["label", "active"]] = [label_s, True]
-                    votes = load_votes()
-                    for _, r in conflict.iloc[1:].iterrows():
-                        dup_id = r["id"]
-                        if not votes.empty:
-                            for col in ["first_id", "second_id", "third_id"]:
-                                votes[col] = votes[col].replace(dup_id, base_id)
-                        cands = cands[cands["id"] != dup_id]
+                    # 同じキーの余剰候補ID → 基準ID の付替え
+                    ids_arr = cands["id"].to_numpy()
+                    dup_ids = ids_arr[(cands["key"].to_numpy() == key_new) & (ids_arr != base_id)]
+                    mapping = {dup_id: base_id for dup_id in dup_ids}
+                    if mapping and not votes.empty:
+                        save_votes(remap_vote_ids(votes, mapping))
+                    cands = cands[~cands["id"].isin(mapping.keys())]
                     save_candidates(cands)
-                    if not votes.empty:
-                        votes.to_csv(VOTES_FILE, index=False)
                     st.success(f"既存の同義候補を『{label_s}』に統一しました")
                 st.rerun()
 
     st.caption("※ 名称変更・追加時は同義/同音候補を自動統合（票はIDを付替え）。")
 
-    for idx, row in cands.reset_index(drop=True).iterrows():
-        col1, col2, col3, col4 = st.columns([4, 2, 2, 3])
-        with col1:
-            new_label = st.text_input("名称", value=row["label"], key=f"label_{idx}")
-        with col2:
-            active = st.checkbox("有効", value=bool(row["active"]), key=f"active_{idx}")
-        with col3:
-            if st.button("保存", key=f"save_{idx}"):
-                cid = row["id"]
-                label_s = (new_label or "").strip()
-                if not label_s:
-                    st.warning("名前を空にはできません")
-                else:
-                    key_new = normalize_for_merge(label_s)
-                    tmp = cands.copy(); tmp["_key"] = tmp["label"].apply(normalize_for_merge)
-                    conflict = tmp[(tmp["_key"] == key_new) & (tmp["id"] != cid)]
-
-                    cands.loc[cands["id"] == cid, ["label", "active"]] = [label_s, active]
-
-                    votes = load_votes()
-                    for _, r in conflict.iterrows():
-                        dup_id = r["id"]
-                        if not votes.empty:
-                            for col in ["first_id", "second_id", "third_id"]:
-                                votes[col] = votes[col].replace(dup_id, cid)
-                        cands = cands[cands["id"] != dup_id]
-
-                    if "_key" in cands.columns:
-                        cands = cands.drop(columns=["_key"])
-                    save_candidates(cands)
-                    if not votes.empty:
-                        votes.to_csv(VOTES_FILE, index=False)
-                    st.success("保存しました（同義統合を適用）")
-                    st.rerun()
-        with col4:
-            if st.button("有効/無効切替", key=f"toggle_{idx}"):
-                cands.loc[cands["id"] == row["id"], "active"] = not bool(row["active"])
-                save_candidates(cands)
-                st.rerun()
-
-            if st.button("削除", key=f"delete_{idx}"):
-                cid = row["id"]
-                votes = load_votes()
-                if not votes.empty:
-                    for col in ["first_id", "second_id", "third_id"]:
-                        votes[col] = votes[col].where(votes[col] != cid, None)
-                    votes.to_csv(VOTES_FILE, index=False)
-                cands = cands[cands["id"] != cid]
-                save_candidates(cands)
-                st.success(f"候補『{row['label']}』を削除しました（既存票は空欄に置換）")
-                st.rerun()
+    # 既存候補の編集（表でまとめて編集・削除し、保存ボタンで一括反映）
+    editable = cands.set_index("id")[["label", "active"]].assign(_delete=False)
+    edited = st.data_editor(
+        editable,
+        key="cands_editor",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "label": st.column_config.TextColumn("名称", required=True),
+            "active": st.column_config.CheckboxColumn("有効"),
+            "_delete": st.column_config.CheckboxColumn("削除"),
+        },
+    )
+    st.caption("※ 削除した候補の既存票は空欄に置換されます。")
+    if st.button("変更を保存"):
+        diff = edited.compare(editable)
+        delete_ids = edited.index[edited["_delete"]].tolist()
+        changed_ids = [cid for cid in diff.index if cid not in delete_ids]
+        labels = {cid: (edited.at[cid, "label"] or "").strip() for cid in changed_ids}
+        if diff.empty:
+            st.info("変更はありません")
+        elif not all(labels.values()):
+            st.warning("名前を空にはできません")
+        else:
+            # 削除分は票を空欄に、名称・有効を反映
+            mapping: Dict[str, Optional[str]] = {cid: None for cid in delete_ids}
+            cands = cands[~cands["id"].isin(delete_ids)]
+            for cid in changed_ids:
+                cands.loc[cands["id"] == cid, ["label", "active", "key"]] = [
+                    labels[cid], bool(edited.at[cid, "active"]), normalize_for_merge(labels[cid])]
+
+            # 変更した候補のキーごとに同義候補を統合（票の付替え＋候補削除）
+            # 変更した候補を先頭に並べ、同じキーの先頭IDを基準IDとして一括で求める
+            is_changed = cands["id"].isin(changed_ids)
+            ordered = cands[["id", "key"]].iloc[np.argsort(~is_changed.to_numpy(), kind="stable")]
+            canonical = ordered.groupby("key")["id"].transform("first")
+            merge_mask = ordered["key"].isin(cands.loc[is_changed, "key"]) & (ordered["id"] != canonical)
+            mapping.update(zip(ordered.loc[merge_mask, "id"], canonical[merge_mask]))
+
+            if mapping and not votes.empty:
+                save_votes(remap_vote_ids(votes, mapping))
+            cands = cands[~cands["id"].isin(mapping.keys())]
+            save_candidates(cands)
+            st.session_state.pop("cands_editor", None)
+            st.success("保存しました（同義統合・削除を適用）")
+            st.rerun()
 
     st.divider()
     with st.expander("危険: 全票リセット"):
         if st.button("votes.csv を削除（全消去）", type="secondary"):
             if os.path.exists(VOTES_FILE):
                 os.remove(VOTES_FILE)
+                _read_votes.clear()
+                cached_aggregate.clear()
+            if os.path.exists(VOTED_FILE):
+                os.remove(VOTED_FILE)
+                _read_voted.clear()
             st.warning("投票データを全消去しました")
             st.rerun()
 